@@ -0,0 +1,115 @@
+import asyncio
+import json
+import logging
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable
+
+
+Callback = Callable[[dict], Awaitable[None]]
+
+# Callback target asking for a notification on the calling MCP session.
+MCP_CALLBACK = "mcp"
+
+DELIVERY_ATTEMPTS = 5
+INITIAL_BACKOFF = 1.0
+HTTP_TIMEOUT = 10.0
+
+
+def http_callback(url: str) -> Callback:
+    if not url.startswith(("http://", "https://")):
+        raise ValueError(f"Callback URL must be http(s): {url}")
+
+    def post(payload: dict) -> None:
+        request = urllib.request.Request(
+            url,
+            data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        # Raises HTTPError on non-2xx responses.
+        with urllib.request.urlopen(request, timeout=HTTP_TIMEOUT):
+            pass
+
+    async def callback(payload: dict) -> None:
+        await asyncio.to_thread(post, payload)
+
+    return callback
+
+
+def mcp_notification_callback(session: Any) -> Callback:
+    async def callback(payload: dict) -> None:
+        await session.send_log_message(
+            level="notice", data=payload, logger="hsr_assistant"
+        )
+
+    return callback
+
+
+class HttpCallbackReceiver:
+    """Local http endpoint on an ephemeral port, collecting POSTed payloads.
+
+    Pass `url` as the callback of a run to check the whole http path.
+    """
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.payloads: list[dict] = []
+        self._received = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+
+        receiver = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                try:
+                    payload = json.loads(body)
+                except ValueError:
+                    self.send_error(400, "Payload is not JSON")
+                    return
+                self.send_response(204)
+                self.end_headers()
+                receiver._loop.call_soon_threadsafe(receiver._receive, payload)
+
+            def log_message(self, format: str, *args) -> None:
+                logging.debug("Callback receiver: " + format, *args)
+
+        self._server = ThreadingHTTPServer((host, 0), Handler)
+        self.url = f"http://{host}:{self._server.server_port}/"
+        threading.Thread(
+            target=self._server.serve_forever, name="callback-receiver", daemon=True
+        ).start()
+
+    def _receive(self, payload: dict) -> None:
+        self.payloads.append(payload)
+        self._received.set()
+
+    async def wait(self) -> dict:
+        await self._received.wait()
+        return self.payloads[-1]
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+async def deliver(callback: Callback, payload: dict) -> bool:
+    backoff = INITIAL_BACKOFF
+    for attempt in range(1, DELIVERY_ATTEMPTS + 1):
+        try:
+            await callback(payload)
+            logging.info("Completion callback delivered on attempt %s.", attempt)
+            return True
+        except Exception as e:
+            logging.warning(
+                "Completion callback attempt %s/%s failed: %s",
+                attempt,
+                DELIVERY_ATTEMPTS,
+                e,
+            )
+        if attempt < DELIVERY_ATTEMPTS:
+            await asyncio.sleep(backoff)
+            backoff *= 2
+    logging.error("Giving up delivering completion callback.")
+    return False
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Any, BinaryIO, Iterator
+
+
+CAPTURE_MAGIC = b"HSRCAP\x01\n"
+# kind (B), seconds since process start (d), payload length (I).
+RECORD_HEADER = struct.Struct("<BdI")
+EXIT_CODE = struct.Struct("<i")
+
+RECORD_STDOUT = 0
+RECORD_STDIN = 1
+RECORD_EXIT = 2
+
+# Output bytes arriving closer together than this are stored as one record.
+COALESCE_SECONDS = 0.05
+
+
+class CaptureWriter:
+    """Records the raw stdout bytes, stdin writes and exit code of one run."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.file: BinaryIO = open(path, "wb")
+        self.file.write(CAPTURE_MAGIC)
+        self.start = time.monotonic()
+        self.pending = bytearray()
+        self.pending_time = 0.0
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self.start
+
+    def _write_record(self, kind: int, elapsed: float, data: bytes) -> None:
+        self.file.write(RECORD_HEADER.pack(kind, elapsed, len(data)))
+        self.file.write(data)
+
+    def _flush_pending(self) -> None:
+        if self.pending:
+            self._write_record(RECORD_STDOUT, self.pending_time, bytes(self.pending))
+            self.pending.clear()
+
+    def write_stdout(self, data: bytes) -> None:
+        elapsed = self._elapsed()
+        if self.pending and elapsed - self.pending_time > COALESCE_SECONDS:
+            self._flush_pending()
+        if not self.pending:
+            self.pending_time = elapsed
+        self.pending += data
+
+    def write_stdin(self, data: bytes) -> None:
+        self._flush_pending()
+        self._write_record(RECORD_STDIN, self._elapsed(), data)
+
+    def write_exit(self, return_code: int) -> None:
+        self._flush_pending()
+        self._write_record(RECORD_EXIT, self._elapsed(), EXIT_CODE.pack(return_code))
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+        self._flush_pending()
+        self.file.close()
+
+
+def read_capture(path: Path) -> Iterator[tuple[int, float, bytes]]:
+    with open(path, "rb") as file:
+        if file.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f"Not a capture file: {path}")
+        while header := file.read(RECORD_HEADER.size):
+            kind, elapsed, length = RECORD_HEADER.unpack(header)
+            yield kind, elapsed, file.read(length)
+
+
+class _ReplayStdin:
+    def __init__(self):
+        self.writes: asyncio.Queue[bytes] = asyncio.Queue()
+
+    def write(self, data: bytes) -> None:
+        self.writes.put_nowait(data)
+
+    async def drain(self) -> None:
+        pass
+
+
+class ReplayProcess:
+    """Stands in for `asyncio.subprocess.Process`, playing back a capture.
+
+    Recorded stdin writes are replayed as handshakes: playback pauses until
+    the driver writes to stdin. A capture without an exit record keeps the
+    process "running" after its last output, until it is terminated.
+    """
+
+    def __init__(self, records: list[tuple[int, float, bytes]], speed: float):
+        self.pid = None
+        self.returncode: int | None = None
+        self.stdout = asyncio.StreamReader()
+        self.stdin = _ReplayStdin()
+        self._exited = asyncio.Event()
+        self._task = asyncio.create_task(self._play(records, speed))
+
+    def __repr__(self) -> str:
+        return f"<ReplayProcess returncode={self.returncode}>"
+
+    async def _play(self, records: list[tuple[int, float, bytes]], speed: float):
+        try:
+            previous = 0.0
+            for kind, elapsed, data in records:
+                await asyncio.sleep(max(elapsed - previous, 0.0) / speed)
+                previous = elapsed
+                if kind == RECORD_STDOUT:
+                    self.stdout.feed_data(data)
+                elif kind == RECORD_STDIN:
+                    await self.stdin.writes.get()
+                elif kind == RECORD_EXIT:
+                    (self.returncode,) = EXIT_CODE.unpack(data)
+                    return
+            await asyncio.Future()  # Hung until terminated, as when recorded.
+        finally:
+            if self.returncode is None:
+                self.returncode = 1
+            self.stdout.feed_eof()
+            self._exited.set()
+
+    def terminate(self) -> None:
+        self._task.cancel()
+
+    def kill(self) -> None:
+        self._task.cancel()
+
+    async def wait(self) -> int:
+        await self._exited.wait()
+        return self.returncode
+
+
+class ReplayBackend:
+    """Drop-in replacement for `asyncio.create_subprocess_exec` that plays a
+    capture file instead of spawning the assistant.
+
+    Set the driver's `time_scale` to `speed` so its stop decisions are made
+    in capture time.
+    """
+
+    def __init__(self, path: Path, speed: float = 1.0):
+        self.path = path
+        self.records = list(read_capture(path))
+        self.speed = speed
+
+    def prepare_to_run(
+        self, run_config: dict, *args, **kwargs
+    ) -> tuple[list[str], dict[str, Any]]:
+        # Nothing to prepare: the capture replaces the sub-project entirely.
+        return [str(self.path)], {}
+
+    async def create_subprocess_exec(self, *args, **kwargs) -> ReplayProcess:
+        logging.info("Replaying capture instead of running: %s", args)
+        return ReplayProcess(self.records, self.speed)
+
+
+def capture_path(capture_dir: Path, run_config: dict) -> Path:
+    capture_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{run_config.get('task')}.hsrcap"
+    return capture_dir / name
+
+
+async def replay(path: Path, run_config: dict, speed: float) -> str:
+    from hsr_assistant_driver.driver import AssistantDriver
+
+    backend = ReplayBackend(path, speed)
+    driver = AssistantDriver(
+        process_factory=backend.create_subprocess_exec,
+        prepare_to_run=backend.prepare_to_run,
+    )
+    driver.timeout = None
+    driver.time_scale = speed
+    return await driver.run(run_config)
+
+
+def main():
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL"),
+        format="%(asctime)s %(levelname)s: %(message)s",
+    )
+
+    parser = argparse.ArgumentParser(description="Replay a captured assistant run.")
+    parser.add_argument("capture", type=Path)
+    parser.add_argument("run_config", type=json.loads)
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Time compression factor."
+    )
+    args = parser.parse_args()
+
+    print(asyncio.run(replay(args.capture, args.run_config, args.speed)))
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,32 @@ import jsonschema
 import os
 import psutil
 import sys
+import time
 import traceback
-from typing import Literal
-
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Literal
+
+from hsr_assistant_driver.callbacks import (
+    MCP_CALLBACK,
+    Callback,
+    deliver,
+    http_callback,
+    mcp_notification_callback,
+)
+from hsr_assistant_driver.capture import CaptureWriter, capture_path
+
+from hsr_assistant_driver.instances import DEFAULT_INSTANCE, Instance, load_instances
+from hsr_assistant_driver.jobs import DetachedProcess, JobRecord, JobStore
+from hsr_assistant_driver.log_summary import (
+    LogSummarizer,
+    is_error_line,
+    stage_title,
+)
 from hsr_assistant_driver.march_7th_assistant import (
     prepare_to_run as prepare_march_7th_assistant,
 )
+from hsr_assistant_driver.timeout_policy import RunHistory, TimeoutPolicy
+from hsr_assistant_driver.tracing import OUTPUT_TRACK, RunTracer, trace_path
 
 
 RUN_CONFIG_JSON_SCHEMA = {
@@ -186,6 +206,16 @@ RUN_CONFIG_JSON_SCHEMA = {
             },
             "required": ["type"],
         },
+        "timeouts": {
+            "type": "object",
+            "properties": {
+                "no_output": {"type": "number", "exclusiveMinimum": 0},
+                "stages": {
+                    "type": "object",
+                    "additionalProperties": {"type": "number", "exclusiveMinimum": 0},
+                },
+            },
+        },
     },
     "required": ["task"],
     "allOf": [
@@ -205,34 +235,91 @@ RUN_CONFIG_JSON_SCHEMA = {
 }
 
 
+class RunFailedError(Exception):
+    """A run that could not be started or resumed. The message is returned
+    in place of the run's logs."""
+
+
 class AssistantDriver:
-    def __init__(self):
-        self.timeout_no_output = 900
+    def __init__(
+        self,
+        process_factory: Callable[..., Awaitable[Any]] = asyncio.create_subprocess_exec,
+        prepare_to_run: Callable[..., tuple[list[str], dict[str, Any]]] = (
+            prepare_march_7th_assistant
+        ),
+        capture_dir: Path | None = None,
+        run_history: RunHistory | None = None,
+        trace_dir: Path | None = None,
+        job_store: JobStore | None = None,
+        instance: Instance | None = None,
+    ):
+        # Sub-project directories and config of the game client this drives.
+        self.instance = instance or Instance(DEFAULT_INSTANCE)
+        # Replaced by `ReplayBackend.create_subprocess_exec` to replay captures.
+        self.process_factory = process_factory
+        # Writes config.yaml and returns the command line. Replaced by
+        # `ReplayBackend.prepare_to_run` so replays leave the sub-project alone.
+        self.prepare_to_run = prepare_to_run
+        # Raw stdout of each run is recorded here when set.
+        self.capture_dir = capture_dir
+        self.capture: CaptureWriter | None = None
+        # No-output timeouts are learned from past runs when set.
+        self.run_history = run_history
+        # Lifecycle trace of each run is exported here when set.
+        self.trace_dir = trace_dir
+        self.tracer = RunTracer("idle")
+        # Runs are durable and can be reattached after a restart when set.
+        self.job_store = job_store
+        self.job_save_interval = 5.0
+
+        self.timeout_no_output = 900  # Default when nothing is learned or overridden.
+        # Run seconds per real second. Set to the replay speed so no-output
+        # timeouts and learned gaps stay in the capture's own time.
+        self.time_scale = 1.0
         self.timeout = 120
+        # Every response ends up in an LLM context, so logs are trimmed by size.
+        self.log_budget_bytes = 8192
 
         self.assistant_task: asyncio.Task | None = None
         self._assistant_task_lock = asyncio.Lock()
+        self._stopping = False
 
-        self.logs: list[str] = []
+        self.logs = LogSummarizer()
         self.partial_line: str = ""
+        self.quit_reasons: list[str] = []
+
+        # Keeps references to in-flight completion callback deliveries.
+        self._callback_tasks: set[asyncio.Task] = set()
+        # Target of the current run's callback, persisted with durable runs.
+        self.callback_target: str | None = None
+        # Set when the current run was left alive for the next driver.
+        self._detached = False
 
     def _format_logs(self, head: str) -> str:
-        log_content = self.logs + [self.partial_line.strip()]
-        if len(log_content) > 100:
-            log_content = (
-                log_content[:50] + ["... lines trimmed ..."] + log_content[-50:]
-            )
+        log_content = self.logs.render(
+            self.log_budget_bytes, extra=self.partial_line.strip()
+        )
         return "\n".join([head, *log_content])
 
-    async def run(self, run_config: dict) -> str:
+    async def run(
+        self,
+        run_config: dict,
+        callback: Callback | None = None,
+        callback_target: str | None = None,
+    ) -> str:
         logging.info("Received run request with config:\n%s", run_config)
         async with self._assistant_task_lock:
             if self.assistant_task is not None:
                 return "Error: An assistant process is already running. Use 'wait' or 'stop'."
+            self.callback_target = callback_target
             self.assistant_task = asyncio.create_task(
                 self._execute_monitor_process(run_config)
             )
             task = self.assistant_task
+            if callback is not None:
+                task.add_done_callback(
+                    lambda done: self._notify_completion(done, callback)
+                )
 
         try:
             return await asyncio.wait_for(asyncio.shield(task), timeout=self.timeout)
@@ -242,6 +329,8 @@ class AssistantDriver:
             )
         except asyncio.CancelledError:
             return "Assistant has been unexpectedly stopped."
+        except RunFailedError as e:
+            return str(e)
         except Exception as e:
             return f"An unexpected error occurred: {e}\n{traceback.format_exc()}"
 
@@ -260,6 +349,8 @@ class AssistantDriver:
             return self._format_logs("Assistant is still running.\nCurrent logs:\n")
         except asyncio.CancelledError:
             return "Assistant has been unexpectedly stopped."
+        except RunFailedError as e:
+            return str(e)
         except Exception as e:
             return f"An unexpected error occurred: {e}\n{traceback.format_exc()}"
 
@@ -272,54 +363,233 @@ class AssistantDriver:
                 )
 
             try:
+                self._stopping = True
                 self.assistant_task.cancel()
                 try:
                     return await self.assistant_task
                 except asyncio.CancelledError:
                     pass
+                except RunFailedError as e:
+                    return str(e)
                 self.assistant_task = None
                 return "Process has been stopped."
             except Exception as e:
                 return f"An unexpected error occurred: {e}\n{traceback.format_exc()}"
+            finally:
+                self._stopping = False
+
+    def _notify_completion(self, task: asyncio.Task, callback: Callback) -> None:
+        if self._detached:
+            # The run goes on; the next driver notifies when it completes.
+            return
+        if task.cancelled():
+            payload = {"status": "stopped", "result": "Process has been stopped."}
+        elif task.exception() is not None:
+            payload = {"status": "error", "result": str(task.exception())}
+        else:
+            payload = {"status": "finished", "result": task.result()}
+        payload["quit_reasons"] = list(self.quit_reasons)
+        self._deliver(callback, payload)
+
+    def _deliver(self, callback: Callback, payload: dict) -> None:
+        delivery = asyncio.create_task(deliver(callback, payload))
+        self._callback_tasks.add(delivery)
+        delivery.add_done_callback(self._callback_tasks.discard)
+
+    async def reattach(self) -> str:
+        """Resumes monitoring of a durable run started by a previous driver."""
+        if self.job_store is None:
+            return "Durable runs are disabled."
+        async with self._assistant_task_lock:
+            if self.assistant_task is not None:
+                return "An assistant process is already running."
 
-    async def _execute_monitor_process(self, run_config: dict) -> str:
-        try:
-            jsonschema.validate(run_config, RUN_CONFIG_JSON_SCHEMA)
-        except jsonschema.ValidationError as e:
-            async with self._assistant_task_lock:
-                self.assistant_task = None
-            return "Invalid run config:\n" + str(e)
-
-        args, kwargs = prepare_march_7th_assistant(run_config)
+            message = "No assistant run to reattach to."
+            for job in self.job_store.load_all():
+                if self.job_store.is_owned_elsewhere(job):
+                    logging.info(
+                        "Run %s is monitored by driver process %s, skipping.",
+                        job.job_id,
+                        job.owner_pid,
+                    )
+                    message = f"Run {job.job_id} is monitored by another driver."
+                elif DetachedProcess.attach(job) is None:
+                    logging.info("Run %s ended while the driver was down.", job.job_id)
+                    lost_reason = "[Lost] Assistant exited while the driver was down."
+                    self.logs.clear()
+                    self.partial_line = ""
+                    self._restore_logs(job, -1)
+                    self.logs.append(self.partial_line.strip())
+                    self.partial_line = ""
+                    self.logs.extend(["**Quit reason(s):**", lost_reason], pinned=True)
+                    self.job_store.remove(job)
+                    message = f"Run {job.job_id} ended while the driver was down."
+                    if callback := self._reattached_callback(job):
+                        self._deliver(
+                            callback,
+                            {
+                                "status": "error",
+                                "result": self._format_logs(message + "\nLogs:\n"),
+                                "quit_reasons": [lost_reason],
+                            },
+                        )
+                elif self.assistant_task is None:
+                    logging.info("Reattaching to run %s (pid %s).", job.job_id, job.pid)
+                    self.job_store.claim(job)
+                    self.job_store.save(job)
+                    self.callback_target = job.callback
+                    self.assistant_task = asyncio.create_task(
+                        self._execute_monitor_process(job.run_config, job)
+                    )
+                    self.assistant_task.add_done_callback(self._log_reattach_failure)
+                    if callback := self._reattached_callback(job):
+                        self.assistant_task.add_done_callback(
+                            lambda done, callback=callback: self._notify_completion(
+                                done, callback
+                            )
+                        )
+                    message = f"Reattached to assistant run {job.job_id}."
+                else:
+                    logging.warning(
+                        "Leaving extra live run %s (pid %s) unmonitored.",
+                        job.job_id,
+                        job.pid,
+                    )
+            return message
+
+    @staticmethod
+    def _log_reattach_failure(task: asyncio.Task) -> None:
+        # Nothing awaits a reattached run until the next `wait`.
+        if not task.cancelled() and task.exception() is not None:
+            logging.warning("Reattached run failed: %s", task.exception())
+
+    def _reattached_callback(self, job: JobRecord) -> Callback | None:
+        if job.callback == MCP_CALLBACK:
+            # The MCP session that asked for it ended with the previous driver.
+            logging.warning(
+                "Cannot deliver the MCP notification for run %s after a restart.",
+                job.job_id,
+            )
+            return None
+        if job.callback is not None:
+            return http_callback(job.callback)
+        return None
 
-        logging.info("Starting assistant with:\nArgs: %s\nKwArgs: %s", args, kwargs)
+    def _restore_logs(self, job: JobRecord, size: int) -> None:
+        # Reads the first `size` bytes of the run log, or all of it for -1.
         try:
-            process = await asyncio.create_subprocess_exec(
+            with open(job.log_path, "rb") as file:
+                content = file.read(size).decode("utf-8", errors="replace")
+        except OSError as e:
+            logging.warning("Failed to read run log %s: %s", job.log_path, e)
+            return
+        *lines, self.partial_line = content.split("\n")
+        for line in lines:
+            self.logs.append(line.strip())
+
+    async def _execute_monitor_process(
+        self, run_config: dict, job: JobRecord | None = None
+    ) -> str:
+        self.quit_reasons = []
+        self._detached = False
+        self.tracer = RunTracer(f"hsr_assistant {run_config.get('task')}")
+        try:
+            with self.tracer.span("run", run_config=run_config):
+                return await self._spawn_and_monitor(run_config, job)
+        finally:
+            if self.trace_dir is not None:
+                self.tracer.export(trace_path(self.trace_dir, run_config))
+
+    async def _spawn(
+        self, args: list[str], kwargs: dict[str, Any], run_config: dict
+    ) -> tuple[Any, JobRecord | None]:
+        env = {**os.environ, "PYTHONIOENCODING": "utf-8"}
+        if self.job_store is None:
+            process = await self.process_factory(
                 *args,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.STDOUT,
                 stdin=asyncio.subprocess.PIPE,
-                env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+                env=env,
                 **kwargs,
             )
-        except Exception:
-            msg = f"Failed to start assistant process, traceback:\n{e}"
-            logging.error(msg)
-            async with self._assistant_task_lock:
-                self.assistant_task = None
-            return msg
+            return process, None
+
+        # Output goes to a log file instead of a pipe so the run survives a
+        # driver restart.
+        job = self.job_store.new_job(run_config, self.callback_target)
+        process = DetachedProcess.spawn(args, Path(job.log_path), env=env, **kwargs)
+        job.pid = process.pid
+        job.create_time = process.ps_process.create_time()
+        self.job_store.save(job)
+        return process, job
+
+    async def _spawn_and_monitor(self, run_config: dict, job: JobRecord | None) -> str:
+        # `job` is given when reattaching to a run of a previous driver.
+        if job is None:
+            try:
+                with self.tracer.span("validate"):
+                    jsonschema.validate(run_config, RUN_CONFIG_JSON_SCHEMA)
+            except jsonschema.ValidationError as e:
+                async with self._assistant_task_lock:
+                    self.assistant_task = None
+                raise RunFailedError("Invalid run config:\n" + str(e)) from e
+
+            with self.tracer.span("prepare_config"):
+                args, kwargs = self.prepare_to_run(
+                    run_config,
+                    self.instance.march_7th_assistant_dir,
+                    self.instance.auto_simulated_universe_dir,
+                    self.instance.config_overrides,
+                )
+
+            logging.info("Starting assistant with:\nArgs: %s\nKwArgs: %s", args, kwargs)
+            try:
+                with self.tracer.span("spawn"):
+                    process, job = await self._spawn(args, kwargs, run_config)
+            except Exception as e:
+                msg = f"Failed to start assistant process, traceback:\n{e}"
+                logging.error(msg)
+                async with self._assistant_task_lock:
+                    self.assistant_task = None
+                raise RunFailedError(msg) from e
+        else:
+            process = DetachedProcess.attach(job)
+            if process is None:
+                self.job_store.remove(job)
+                async with self._assistant_task_lock:
+                    self.assistant_task = None
+                raise RunFailedError(
+                    f"Assistant process {job.pid} is no longer running."
+                )
         logging.info("Assistant process %s", process)
 
+        if self.run_history is not None:
+            timeout_policy = self.run_history.policy(run_config, self.timeout_no_output)
+        else:
+            timeout_policy = TimeoutPolicy(
+                self.timeout_no_output, overrides=run_config.get("timeouts")
+            )
+
+        if self.capture_dir is not None:
+            self.capture = CaptureWriter(capture_path(self.capture_dir, run_config))
+            logging.info("Recording assistant output to %s", self.capture.path)
+
+        self.logs.clear()
+        self.partial_line = ""
         output_queue: asyncio.Queue[str] = asyncio.Queue()
-        reader_task = asyncio.create_task(
-            self._read_char_stream(process.stdout, output_queue)
-        )
+        if job is None:
+            reader = self._read_char_stream(process.stdout, output_queue)
+        else:
+            self._restore_logs(job, job.log_offset)
+            reader = self._tail_log_file(job, process, output_queue)
+        reader_task = asyncio.create_task(reader)
         monitoring_task = asyncio.create_task(
-            self._monitor_process(process, output_queue)
+            self._monitor_process(
+                process, output_queue, run_config, timeout_policy, job
+            )
         )
 
-        self.logs = []
-        self.partial_line = ""
         was_cancelled = False
         try:
             monitoring_result = await monitoring_task
@@ -329,8 +599,17 @@ class AssistantDriver:
             was_cancelled = True
             raise
         finally:
-            if process.returncode is None:
-                await self._terminate_process_tree(process)
+            teardown_start = self.tracer.now()
+            exit_code = process.returncode
+            # Cancelled without `stop` means the driver is shutting down. Leave
+            # durable runs alive so that the next driver can reattach.
+            detach = was_cancelled and not self._stopping and job is not None
+            if detach:
+                self._detached = True
+                logging.info("Leaving %s running for reattach.", process)
+            elif process.returncode is None:
+                with self.tracer.span("terminate_process_tree"):
+                    await self._terminate_process_tree(process)
             else:
                 logging.info(
                     "Process already exited with code %s. (%s)",
@@ -344,31 +623,75 @@ class AssistantDriver:
             await asyncio.gather(reader_task, monitoring_task, return_exceptions=True)
             logging.info("Reader and monitoring tasks cancelled.")
 
+            if self.capture is not None:
+                if exit_code is not None:
+                    self.capture.write_exit(exit_code)
+                self.capture.close()
+                self.capture = None
+
+            if job is not None:
+                if detach:
+                    self.job_store.save(job)
+                else:
+                    self.job_store.remove(job)
+
+            self.tracer.add_span("teardown", teardown_start, self.tracer.now())
+
             if not was_cancelled:
                 async with self._assistant_task_lock:
                     self.assistant_task = None
 
     async def _monitor_process(
-        self, process: asyncio.subprocess.Process, output_queue: asyncio.Queue[str]
+        self,
+        process: asyncio.subprocess.Process,
+        output_queue: asyncio.Queue[str],
+        run_config: dict,
+        timeout_policy: TimeoutPolicy,
+        job: JobRecord | None,
     ) -> str:
-        quit_reasons: list[str] = []
+        loop = asyncio.get_running_loop()
+        stage = job.stage if job is not None else ""  # "" before the first header.
+        stage_max_gaps: dict[str, float] = {}
+        timed_out_stage: str | None = None
+        last_output_time = loop.time()
+
+        monitor_start = self.tracer.now()
+        stage_start = monitor_start
+        first_output = True
 
         while True:  # We do not care about the process terminates or not. We just drain the output.
+            timeout_no_output = timeout_policy.no_output_timeout(stage)
             try:
                 char = await asyncio.wait_for(
-                    output_queue.get(), self.timeout_no_output
+                    output_queue.get(), timeout_no_output / self.time_scale
                 )
+                output_queue.task_done()
             except asyncio.TimeoutError:
                 logging.info(
-                    "No output for %s seconds. Stopping monitoring. (%s)",
-                    self.timeout_no_output,
+                    "No output for %s seconds in stage %r. Stopping monitoring. (%s)",
+                    timeout_no_output,
+                    stage,
                     process,
                 )
-                quit_reasons.append(
-                    f"[Timeout] No output for {self.timeout_no_output} seconds."
+                self.quit_reasons.append(
+                    f"[Timeout] No output for {timeout_no_output} seconds."
                 )
+                timed_out_stage = stage
                 break
 
+            now = loop.time()
+            stage_max_gaps[stage] = max(
+                stage_max_gaps.get(stage, 0.0),
+                (now - last_output_time) * self.time_scale,
+            )
+            last_output_time = now
+
+            if first_output:
+                first_output = False
+                self.tracer.add_span(
+                    "time_to_first_output", monitor_start, self.tracer.now()
+                )
+
             if not char:  # EOF
                 logging.info("EOF reached. Stopping monitoring. (%s)", process)
                 break
@@ -379,31 +702,63 @@ class AssistantDriver:
                 self.logs.append(line)
                 self.partial_line = ""
 
+                if title := stage_title(line):
+                    stage_end = self.tracer.now()
+                    self.tracer.add_span(
+                        stage or "startup", stage_start, stage_end, OUTPUT_TRACK
+                    )
+                    self.tracer.event("stage_header", OUTPUT_TRACK, title=title)
+                    stage = title
+                    stage_start = stage_end
+                    if job is not None:
+                        job.stage = stage
+
                 # We want the full "ERROR" line so we detect it here.
-                # "ERROR"s in simul.py is retrying, not real error.
-                if "ERROR" in line and "simul.py:" not in line:
+                if is_error_line(line):
                     logging.info(
                         "Error log detected. Stopping monitoring. (%s)", process
                     )
-                    quit_reasons.append("[Error] Error log detected.")
+                    self.quit_reasons.append("[Error] Error log detected.")
                     break  # Stop monitoring.
 
             if self.partial_line.endswith("按回车键关闭窗口. . ."):
-                process.stdin.write(b"\n")
-                await process.stdin.drain()
+                try:
+                    process.stdin.write(b"\n")
+                    if self.capture is not None:
+                        self.capture.write_stdin(b"\n")
+                    await process.stdin.drain()
+                except (BrokenPipeError, ConnectionResetError) as e:
+                    logging.warning(
+                        "Closing prompt left unanswered: %s (%s)", e, process
+                    )
+                    self.quit_reasons.append(
+                        f"[Stdin] Closing prompt left unanswered: {e}"
+                    )
                 self.logs.append(self.partial_line.strip())
                 self.partial_line = ""
 
+        self.tracer.add_span(
+            stage or "startup", stage_start, self.tracer.now(), OUTPUT_TRACK
+        )
+        self.tracer.event("monitor_stopped", quit_reasons=list(self.quit_reasons))
+
         try:
-            return_code = await asyncio.wait_for(process.wait(), timeout=1.0)
-            quit_reasons.append(f"[Exit] Assistant exited with code {return_code}.")
+            with self.tracer.span("wait_exit"):
+                return_code = await asyncio.wait_for(process.wait(), timeout=1.0)
+            self.quit_reasons.append(
+                f"[Exit] Assistant exited with code {return_code}."
+            )
         except asyncio.TimeoutError:
             pass
 
+        if self.run_history is not None:
+            self.run_history.record(run_config, stage_max_gaps, timed_out_stage)
+
         self.logs.append(self.partial_line.strip())
         self.partial_line = ""
-        self.logs.extend(["**Quit reason(s):**", *quit_reasons])
+        self.logs.extend(["**Quit reason(s):**", *self.quit_reasons], pinned=True)
 
+        self.tracer.add_span("monitor", monitor_start, self.tracer.now())
         return self._format_logs("Logs:\n")
 
     async def _read_char_stream(
@@ -412,6 +767,8 @@ class AssistantDriver:
         decoder = codecs.getincrementaldecoder("utf-8")()
         try:
             while byte_chunk := await stream.read(1):
+                if self.capture is not None:
+                    self.capture.write_stdout(byte_chunk)
                 try:
                     if char := decoder.decode(byte_chunk):
                         await queue.put(char)
@@ -421,10 +778,51 @@ class AssistantDriver:
         finally:
             await queue.put("")
 
+    async def _tail_log_file(
+        self, job: JobRecord, process: DetachedProcess, queue: asyncio.Queue
+    ) -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        last_save = time.monotonic()
+        try:
+            with open(job.log_path, "rb") as file:
+                file.seek(job.log_offset)
+                while True:
+                    # Checked before reading so output written right before
+                    # the exit is not missed.
+                    exited = process.returncode is not None
+                    byte_chunk = file.read(4096)
+                    if not byte_chunk:
+                        if exited:
+                            break
+                        await asyncio.sleep(0.1)
+                        continue
+
+                    if self.capture is not None:
+                        self.capture.write_stdout(byte_chunk)
+                    text = decoder.decode(byte_chunk)
+                    print(text, end="", file=sys.stderr, flush=True)
+                    for char in text:
+                        await queue.put(char)
+                    # Only count the chunk once the monitor has seen all of
+                    # it, so the next driver rescans anything left unchecked.
+                    # Bytes of an incomplete character are left for it too.
+                    await queue.join()
+                    job.log_offset = file.tell() - len(decoder.getstate()[0])
+
+                    if time.monotonic() - last_save > self.job_save_interval:
+                        self.job_store.save(job)
+                        last_save = time.monotonic()
+        finally:
+            await queue.put("")
+
     async def _terminate_process_tree(
         self, process: asyncio.subprocess.Process
     ) -> None:
         logging.info("Terminating process tree for %s", process)
+        if process.pid is None:  # Replayed process, nothing to kill.
+            process.terminate()
+            await process.wait()
+            return
         try:
             ps_process = psutil.Process(process.pid)
             children = ps_process.children(recursive=True)
@@ -434,7 +832,8 @@ class AssistantDriver:
             logging.info("Terminating process %s", process)
 
             try:
-                await asyncio.wait_for(process.wait(), timeout=5.0)
+                with self.tracer.span("graceful_terminate"):
+                    await asyncio.wait_for(process.wait(), timeout=5.0)
                 logging.info(
                     "Process terminated gracefully in 5 seconds. (%s)", process
                 )
@@ -448,7 +847,8 @@ class AssistantDriver:
                     logging.warning("Process %s no longer exists.", process)
 
                 logging.info("Waiting for process to terminate ... (%s)", process)
-                await process.wait()
+                with self.tracer.span("kill"):
+                    await process.wait()
 
                 for child in children:
                     logging.info("Killing child process %s. (%s)", child, process)
@@ -461,30 +861,151 @@ class AssistantDriver:
             logging.error("Error terminating process tree %s: %s", process, e)
 
 
-_driver_instance = AssistantDriver()
+class DriverPool:
+    """One `AssistantDriver` per instance, with runs routed to free ones."""
 
+    def __init__(self, drivers: dict[str, AssistantDriver]):
+        self.drivers = drivers
+        # `wait` and `stop` without an instance go to the latest run.
+        self.last_instance = next(iter(drivers))
 
-HSR_ASSISTANT_ARGS_JSON_SCHEMA = {
-    "type": "object",
-    "properties": {
-        "action": {"type": "string", "enum": ["run", "wait", "stop"]},
-        "run_config": RUN_CONFIG_JSON_SCHEMA,
-    },
-    "required": ["action"],
-    "if": {"properties": {"action": {"const": "run"}}},
-    "then": {"required": ["run_config"]},
-}
+    def _format(self, instance: str, result: str) -> str:
+        if len(self.drivers) == 1:
+            return result
+        return f"Instance: {instance}\n{result}"
+
+    def _resolve(self, instance: str | None) -> str:
+        instance = instance or self.last_instance
+        if instance not in self.drivers:
+            raise ValueError(
+                f"Unknown instance {instance!r}, expected one of {list(self.drivers)}."
+            )
+        return instance
+
+    async def run(
+        self,
+        run_config: dict,
+        callback: Callback | None = None,
+        instance: str | None = None,
+        callback_target: str | None = None,
+    ) -> str:
+        if instance is None:
+            instance = next(
+                (
+                    instance_id
+                    for instance_id, driver in self.drivers.items()
+                    if driver.assistant_task is None
+                ),
+                None,
+            )
+            if instance is None:
+                return "Error: All instances are running. Use 'wait' or 'stop'."
+        instance = self._resolve(instance)
+        self.last_instance = instance
+        return self._format(
+            instance,
+            await self.drivers[instance].run(run_config, callback, callback_target),
+        )
+
+    async def wait(self, instance: str | None = None) -> str:
+        instance = self._resolve(instance)
+        return self._format(instance, await self.drivers[instance].wait())
+
+    async def stop(self, instance: str | None = None) -> str:
+        instance = self._resolve(instance)
+        return self._format(instance, await self.drivers[instance].stop())
+
+    async def reattach(self) -> str:
+        results = []
+        for instance, driver in self.drivers.items():
+            results.append(self._format(instance, await driver.reattach()))
+            if driver.assistant_task is not None:
+                self.last_instance = instance
+        return "\n".join(results)
+
+
+def _create_driver(instance: Instance, run_history: RunHistory) -> AssistantDriver:
+    def output_dir(env_name: str) -> Path | None:
+        if not os.getenv(env_name):
+            return None
+        if instance.instance_id == DEFAULT_INSTANCE:
+            return Path(os.environ[env_name])
+        return Path(os.environ[env_name]) / instance.instance_id
+
+    return AssistantDriver(
+        capture_dir=output_dir("HSR_ASSISTANT_CAPTURE_DIR"),
+        run_history=run_history,
+        job_store=JobStore(instance.runs_dir),
+        trace_dir=output_dir("HSR_ASSISTANT_TRACE_DIR"),
+        instance=instance,
+    )
+
+
+_run_history = RunHistory()
+_driver_pool: DriverPool | None = None
+
+
+def get_driver_pool() -> DriverPool:
+    # Built on first use rather than at import, since preparing the instances
+    # clones the sub-projects. The servers build it on startup.
+    global _driver_pool
+    if _driver_pool is None:
+        _driver_pool = DriverPool(
+            {
+                instance.instance_id: _create_driver(instance, _run_history)
+                for instance in load_instances()
+            }
+        )
+    return _driver_pool
+
+
+def hsr_assistant_args_json_schema() -> dict:
+    return {
+        "type": "object",
+        "properties": {
+            "action": {"type": "string", "enum": ["run", "wait", "stop"]},
+            "run_config": RUN_CONFIG_JSON_SCHEMA,
+            "callback": {
+                "type": "string",
+                "description": "Where to push the result when the run finishes: "
+                "an http(s) URL, or 'mcp' for a notification on the MCP session.",
+                "anyOf": [{"const": "mcp"}, {"pattern": "^https?://"}],
+            },
+            "instance": {
+                "type": "string",
+                "description": "Game client to use. 'run' picks a free one when "
+                "omitted, 'wait' and 'stop' default to the latest run.",
+                "enum": list(get_driver_pool().drivers),
+            },
+        },
+        "required": ["action"],
+        "if": {"properties": {"action": {"const": "run"}}},
+        "then": {"required": ["run_config"]},
+    }
+
+
+async def reattach_assistant() -> str:
+    return await get_driver_pool().reattach()
 
 
 async def call_hsr_assistant(
-    action: Literal["run", "wait", "stop"], run_config: dict | None
+    action: Literal["run", "wait", "stop"],
+    run_config: dict | None,
+    callback: str | Callback | None = None,
+    instance: str | None = None,
+    mcp_session: Any = None,
 ) -> str:
-    global _driver_instance
+    driver_pool = get_driver_pool()
     if action == "run":
         assert run_config is not None
-        return await _driver_instance.run(run_config)
+        callback_target = callback if isinstance(callback, str) else None
+        if callback == MCP_CALLBACK:
+            callback = mcp_notification_callback(mcp_session)
+        elif isinstance(callback, str):
+            callback = http_callback(callback)
+        return await driver_pool.run(run_config, callback, instance, callback_target)
     elif action == "wait":
-        return await _driver_instance.wait()
+        return await driver_pool.wait(instance)
     elif action == "stop":
-        return await _driver_instance.stop()
+        return await driver_pool.stop(instance)
     return "NotImplemented action: " + action
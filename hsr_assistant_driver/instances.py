@@ -0,0 +1,135 @@
+import logging
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import yaml
+
+from hsr_assistant_driver.jobs import RUNS_DIR, JobStore
+from hsr_assistant_driver.march_7th_assistant import (
+    AUTO_SIMULATED_UNIVERSE_DIR,
+    MARCH_7TH_ASSISTANT_DIR,
+)
+
+
+INSTANCES_DIR = Path(__file__).parent.parent / "instances"
+DEFAULT_INSTANCE = "default"
+
+# Config-like files are copied, so an instance never writes through a link
+# into the prepared sub-project. Everything else is hardlinked.
+COPIED_SUFFIXES = {".yaml", ".yml", ".json", ".ini", ".cfg", ".toml", ".txt", ".log"}
+SKIPPED_DIRS = {".git", "__pycache__"}
+EMPTIED_DIRS = {"logs"}
+# Holds the fingerprint of the source the clone was made from.
+CLONE_MARKER = ".clone_complete"
+FINGERPRINT_FILES = [".git/HEAD", ".git/index", "pyproject.toml", "uv.lock"]
+
+
+@dataclass
+class Instance:
+    instance_id: str
+    march_7th_assistant_dir: Path = MARCH_7TH_ASSISTANT_DIR
+    auto_simulated_universe_dir: Path = AUTO_SIMULATED_UNIVERSE_DIR
+    # Merged into config.yaml of every run, e.g. to select the game window.
+    config_overrides: dict = field(default_factory=dict)
+    runs_dir: Path = RUNS_DIR
+
+
+def clone_tree(src: Path, dst: Path) -> None:
+    for dir_path, dir_names, file_names in os.walk(src):
+        dir_names[:] = [name for name in dir_names if name not in SKIPPED_DIRS]
+        target_dir = dst / Path(dir_path).relative_to(src)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        if Path(dir_path).name in EMPTIED_DIRS:
+            dir_names[:] = []
+            continue
+        for name in file_names:
+            source, target = Path(dir_path) / name, target_dir / name
+            if source.suffix.lower() in COPIED_SUFFIXES:
+                shutil.copy2(source, target)
+                continue
+            try:
+                os.link(source, target)
+            except OSError:  # Different volume or no hardlink support.
+                shutil.copy2(source, target)
+
+
+def source_fingerprint(src: Path) -> str:
+    # Cheap enough for every start: a new checkout, a patched pyproject.toml
+    # or a re-locked environment changes the mtime of one of these.
+    parts = []
+    for name in FINGERPRINT_FILES:
+        try:
+            parts.append(f"{name}:{(src / name).stat().st_mtime_ns}")
+        except OSError:
+            parts.append(f"{name}:-")
+    return " ".join(parts)
+
+
+def _read_marker(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def prepare_instance(instance_id: str) -> Instance:
+    root = INSTANCES_DIR / instance_id
+    runs_dir = root / "runs"
+    for src in [MARCH_7TH_ASSISTANT_DIR, AUTO_SIMULATED_UNIVERSE_DIR]:
+        if not src.exists():
+            raise FileNotFoundError(f"Sub-project {src} is not prepared.")
+        dst = root / src.name
+        fingerprint = source_fingerprint(src)
+        marker = _read_marker(dst / CLONE_MARKER)
+        if marker == fingerprint:
+            continue
+        if marker is not None:
+            if JobStore(runs_dir).load_all():
+                logging.warning(
+                    "%s changed, but instance %s has a run in progress."
+                    " Keeping its clone until the next start.",
+                    src,
+                    instance_id,
+                )
+                continue
+            logging.info("%s changed since it was cloned.", src)
+        if dst.exists():  # Outdated, or left over from an interrupted clone.
+            shutil.rmtree(dst)
+        logging.info("Cloning %s into %s", src, dst)
+        clone_tree(src, dst)
+        (dst / CLONE_MARKER).write_text(fingerprint, encoding="utf-8")
+
+    config_overrides = {}
+    overrides_path = root / "config_overrides.yaml"
+    if overrides_path.exists():
+        with open(overrides_path, encoding="utf-8") as file:
+            config_overrides = yaml.safe_load(file) or {}
+
+    return Instance(
+        instance_id=instance_id,
+        march_7th_assistant_dir=root / MARCH_7TH_ASSISTANT_DIR.name,
+        auto_simulated_universe_dir=root / AUTO_SIMULATED_UNIVERSE_DIR.name,
+        config_overrides=config_overrides,
+        runs_dir=runs_dir,
+    )
+
+
+def load_instances() -> list[Instance]:
+    instance_ids = [
+        instance_id.strip()
+        for instance_id in os.getenv("HSR_ASSISTANT_INSTANCES", "").split(",")
+        if instance_id.strip()
+    ]
+    if not instance_ids:
+        return [Instance(DEFAULT_INSTANCE)]
+    instances = []
+    for instance_id in instance_ids:
+        try:
+            instances.append(prepare_instance(instance_id))
+        except (OSError, yaml.YAMLError) as e:
+            raise RuntimeError(
+                f"Cannot prepare instance {instance_id!r} of HSR_ASSISTANT_INSTANCES: {e}"
+            ) from e
+    return instances
@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import IO
+
+import psutil
+
+
+RUNS_DIR = Path(__file__).parent.parent / "runs"
+
+# Exit code reported for a reattached process whose real code is unknowable.
+UNKNOWN_EXIT_CODE = -1
+
+
+@dataclass
+class JobRecord:
+    job_id: str
+    run_config: dict
+    log_path: str
+    pid: int = 0
+    create_time: float = 0.0
+    # Bytes of the log already consumed by the monitor.
+    log_offset: int = 0
+    stage: str = ""
+    # Completion callback target: an http(s) URL or "mcp".
+    callback: str | None = None
+    # Driver process monitoring the run. Other drivers leave it alone while
+    # that process is alive.
+    owner_pid: int = 0
+    owner_create_time: float = 0.0
+
+
+class JobStore:
+    """Persists the metadata of durable runs so that a restarted driver can
+    find and reattach to them."""
+
+    def __init__(self, runs_dir: Path = RUNS_DIR):
+        self.runs_dir = runs_dir
+
+    def _metadata_path(self, job_id: str) -> Path:
+        return self.runs_dir / f"{job_id}.json"
+
+    def new_job(self, run_config: dict, callback: str | None = None) -> JobRecord:
+        self.runs_dir.mkdir(parents=True, exist_ok=True)
+        job_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{run_config.get('task')}"
+        log_path = self.runs_dir / f"{job_id}.log"
+        job = JobRecord(
+            job_id=job_id,
+            run_config=run_config,
+            log_path=str(log_path),
+            callback=callback,
+        )
+        self.claim(job)
+        return job
+
+    def claim(self, job: JobRecord) -> None:
+        this_process = psutil.Process()
+        job.owner_pid = this_process.pid
+        job.owner_create_time = this_process.create_time()
+
+    def is_owned_elsewhere(self, job: JobRecord) -> bool:
+        if job.owner_pid in (0, os.getpid()):
+            return False
+        try:
+            owner = psutil.Process(job.owner_pid)
+            return (
+                abs(owner.create_time() - job.owner_create_time) <= 1e-3
+                and owner.is_running()
+            )
+        except psutil.Error:
+            return False
+
+    def save(self, job: JobRecord) -> None:
+        path = self._metadata_path(job.job_id)
+        temp_path = path.with_suffix(".json.tmp")
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump(asdict(job), file, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def load_all(self) -> list[JobRecord]:
+        jobs = []
+        for path in sorted(self.runs_dir.glob("*.json")):
+            try:
+                with open(path, encoding="utf-8") as file:
+                    jobs.append(JobRecord(**json.load(file)))
+            except (OSError, ValueError, TypeError) as e:
+                logging.warning("Ignoring unreadable job metadata %s: %s", path, e)
+        return jobs
+
+    def remove(self, job: JobRecord) -> None:
+        for path in [self._metadata_path(job.job_id), Path(job.log_path)]:
+            try:
+                path.unlink(missing_ok=True)
+            except OSError as e:
+                logging.warning("Failed to remove %s: %s", path, e)
+
+
+class _PipeStdin:
+    def __init__(self, pipe: IO[bytes]):
+        self.pipe = pipe
+
+    def write(self, data: bytes) -> None:
+        self.pipe.write(data)
+        self.pipe.flush()
+
+    async def drain(self) -> None:
+        pass
+
+
+class _DetachedStdin:
+    # The stdin pipe closed with the previous driver, so the assistant reads
+    # EOF at its prompt instead of the answer.
+    def write(self, data: bytes) -> None:
+        raise BrokenPipeError("Stdin of a reattached process is gone.")
+
+    async def drain(self) -> None:
+        pass
+
+
+class DetachedProcess:
+    """Process handle with the parts of `asyncio.subprocess.Process` used by
+    the driver, for processes that outlive the driver."""
+
+    def __init__(self, ps_process: psutil.Process, popen: subprocess.Popen | None):
+        self.ps_process = ps_process
+        self.popen = popen
+        self.pid = ps_process.pid
+        self.stdin = _PipeStdin(popen.stdin) if popen is not None else _DetachedStdin()
+        self._returncode: int | None = None
+
+    def __repr__(self) -> str:
+        return f"<DetachedProcess {self.pid} returncode={self.returncode}>"
+
+    @classmethod
+    def spawn(cls, args: list[str], log_path: Path, **kwargs) -> "DetachedProcess":
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True
+        with open(log_path, "wb") as log_file:
+            popen = subprocess.Popen(
+                args,
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                stdin=subprocess.PIPE,
+                **kwargs,
+            )
+        return cls(psutil.Process(popen.pid), popen)
+
+    @classmethod
+    def attach(cls, job: JobRecord) -> "DetachedProcess | None":
+        try:
+            ps_process = psutil.Process(job.pid)
+            if abs(ps_process.create_time() - job.create_time) > 1e-3:
+                return None  # The pid has been reused.
+            if not ps_process.is_running():
+                return None
+        except psutil.Error:
+            return None
+        return cls(ps_process, None)
+
+    @property
+    def returncode(self) -> int | None:
+        if self._returncode is not None:
+            return self._returncode
+        if self.popen is not None:
+            self._returncode = self.popen.poll()
+            return self._returncode
+        try:
+            if self.ps_process.status() != psutil.STATUS_ZOMBIE:
+                return None
+        except psutil.NoSuchProcess:
+            pass
+        try:
+            # Only known on Windows for processes that are not our children.
+            code = self.ps_process.wait(timeout=0)
+        except psutil.TimeoutExpired:
+            return None
+        self._returncode = code if code is not None else UNKNOWN_EXIT_CODE
+        return self._returncode
+
+    def terminate(self) -> None:
+        try:
+            self.ps_process.terminate()
+        except psutil.NoSuchProcess:
+            pass
+
+    def kill(self) -> None:
+        try:
+            self.ps_process.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+    async def wait(self) -> int:
+        while (returncode := self.returncode) is None:
+            await asyncio.sleep(0.2)
+        return returncode
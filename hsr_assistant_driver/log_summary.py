@@ -0,0 +1,151 @@
+import re
+from dataclasses import dataclass
+
+
+# Timestamps and retry / attempt counters are the only thing that differs
+# between repeated polling lines, so they are masked before comparing lines.
+# Other numbers (counts, ids, stamina, rewards) are kept significant.
+_TIMESTAMP_RE = re.compile(
+    r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?|\d{2}:\d{2}:\d{2}(?:[.,]\d+)?"
+)
+_COUNTER_RE = re.compile(
+    r"(?i)(\b(?:retry|retrying|retries|attempt|try)\b\s*[#:(]?\s*)\d+(?:\s*/\s*\d+)?"
+    r"|(第\s*)\d+(\s*次)|((?:重试|尝试)\s*)\d+"
+)
+# Stage headers printed by `log.hr` in March7thAssistant, e.g. "+----+",
+# "|  准备模拟宇宙  |", "===== 开始 =====" and "----- 开始 -----".
+_STAGE_HEADER_RE = re.compile(r"^(?:\+-{3,}\+|\|.*\||={3,} .* ={3,}|-{3,} .* -{3,})$")
+_STAGE_TITLE_RE = re.compile(r"^(?:\|(.*)\||={3,} (.*) ={3,}|-{3,} (.*) -{3,})$")
+# Upper bound of the size of one "... N lines trimmed ..." marker.
+_TRIM_MARKER_BYTES = len("... 9999999 lines trimmed ...\n")
+
+
+def _mask_counter(match: re.Match) -> str:
+    prefix = match.group(1) or match.group(2) or match.group(4) or ""
+    return f"{prefix}#{match.group(3) or ''}"
+
+
+def normalize_line(line: str) -> str:
+    line = _TIMESTAMP_RE.sub("<ts>", line)
+    return _COUNTER_RE.sub(_mask_counter, line)
+
+
+def stage_title(line: str) -> str | None:
+    if match := _STAGE_TITLE_RE.match(line):
+        return next(group for group in match.groups() if group is not None).strip()
+    return None
+
+
+def is_error_line(line: str) -> bool:
+    # "ERROR"s in simul.py is retrying, not real error.
+    return "ERROR" in line and "simul.py:" not in line
+
+
+def is_pinned_line(line: str) -> bool:
+    return (
+        "WARNING" in line
+        or is_error_line(line)
+        or _STAGE_HEADER_RE.match(line) is not None
+    )
+
+
+@dataclass
+class LogEntry:
+    text: str
+    key: str
+    count: int = 1
+    pinned: bool = False
+    # Text of the first line of a collapsed run, `text` holds the latest one.
+    first_text: str | None = None
+
+    def render(self) -> str:
+        if self.count == 1:
+            return self.text
+        if self.first_text is not None and self.first_text != self.text:
+            return f"{self.first_text}\n... {self.text} [repeated {self.count}x]"
+        return f"{self.text} [repeated {self.count}x]"
+
+
+class LogSummarizer:
+    """Collapses consecutive near-duplicate log lines as they arrive and
+    renders them within a byte budget, always keeping pinned lines."""
+
+    def __init__(self):
+        self.entries: list[LogEntry] = []
+
+    def clear(self) -> None:
+        self.entries = []
+
+    def append(self, line: str, pinned: bool = False) -> None:
+        key = normalize_line(line)
+        pinned = pinned or is_pinned_line(line)
+        if self.entries and self.entries[-1].key == key:
+            last = self.entries[-1]
+            if last.first_text is None:
+                last.first_text = last.text
+            last.text = line
+            last.count += 1
+            last.pinned = last.pinned or pinned
+            return
+        self.entries.append(LogEntry(text=line, key=key, pinned=pinned))
+
+    def extend(self, lines: list[str], pinned: bool = False) -> None:
+        for line in lines:
+            self.append(line, pinned=pinned)
+
+    def render(self, max_bytes: int, extra: str | None = None) -> list[str]:
+        entries = list(self.entries)
+        if extra is not None:
+            entries.append(LogEntry(text=extra, key=normalize_line(extra)))
+
+        lines = [entry.render() for entry in entries]
+        sizes = [len(line.encode("utf-8")) + 1 for line in lines]
+        if sum(sizes) <= max_bytes:
+            return lines
+
+        # Each block of kept pinned lines may follow a trim marker; the head,
+        # the tail and the end may need one more each.
+        keep = [False] * len(entries)
+        budget = max_bytes - 3 * _TRIM_MARKER_BYTES
+        for i in reversed(range(len(entries))):
+            if not entries[i].pinned:
+                continue
+            starts_block = i + 1 == len(entries) or not keep[i + 1]
+            cost = sizes[i] + (_TRIM_MARKER_BYTES if starts_block else 0)
+            if cost > budget:
+                break  # Older pinned lines are trimmed like any other.
+            budget -= cost
+            keep[i] = True
+        budget = max(budget, 0)
+        unpinned = [i for i, k in enumerate(keep) if not k]
+
+        # Split the remaining budget between the oldest and the newest lines.
+        head_budget = budget // 2
+        head_end = 0
+        for i in unpinned:
+            if sizes[i] > head_budget:
+                break
+            head_budget -= sizes[i]
+            keep[i] = True
+            head_end += 1
+
+        tail_budget = budget - budget // 2 + head_budget
+        for i in reversed(unpinned[head_end:]):
+            if sizes[i] > tail_budget:
+                break
+            tail_budget -= sizes[i]
+            keep[i] = True
+
+        result: list[str] = []
+        trimmed = 0
+        for line, entry, k in zip(lines, entries, keep):
+            if k:
+                if trimmed:
+                    result.append(f"... {trimmed} lines trimmed ...")
+                    trimmed = 0
+                result.append(line)
+            else:
+                trimmed += entry.count
+        if trimmed:
+            result.append(f"... {trimmed} lines trimmed ...")
+        return result
@@ -0,0 +1,154 @@
+import asyncio
+import cProfile
+import logging
+import pstats
+import signal
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+
+PROFILE_DIR = Path(__file__).parent.parent / "profiles"
+
+
+class LoopLagMonitor:
+    """Measures event loop scheduling delay with a periodic heartbeat.
+
+    A watchdog thread samples the loop thread's stack while a heartbeat is
+    overdue, so the worst stalls are kept together with the code that was
+    running.
+    """
+
+    def __init__(
+        self, interval: float = 0.1, stall_threshold: float = 0.2, max_stalls: int = 10
+    ):
+        self.interval = interval
+        self.stall_threshold = stall_threshold
+        self.max_stalls = max_stalls
+
+        self.samples = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        # (lag seconds, wall clock time, stack of the loop thread)
+        self.stalls: list[tuple[float, float, str]] = []
+
+        self._heartbeat = time.monotonic()
+        self._stall_stack: str | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._beat())
+        threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(now - expected, 0.0)
+            self._heartbeat = now
+
+            self.samples += 1
+            self.total_lag += lag
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.stall_threshold:
+                self._record_stall(lag, self._stall_stack or "(stack not sampled)\n")
+            self._stall_stack = None
+
+    def _watch(self) -> None:
+        while self._task is not None:
+            time.sleep(self.interval)
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue > self.stall_threshold and self._stall_stack is None:
+                frame = sys._current_frames().get(self._loop_thread_id)
+                if frame is not None:
+                    self._stall_stack = "".join(traceback.format_stack(frame, limit=15))
+
+    def _record_stall(self, lag: float, stack: str) -> None:
+        logging.warning("Event loop stalled for %.3f seconds in:\n%s", lag, stack)
+        self.stalls.append((lag, time.time(), stack))
+        self.stalls.sort(key=lambda stall: stall[0], reverse=True)
+        del self.stalls[self.max_stalls :]
+
+    def report(self) -> str:
+        mean_lag = self.total_lag / self.samples if self.samples else 0.0
+        lines = [
+            f"Samples: {self.samples}, mean lag: {mean_lag * 1000:.1f} ms,"
+            f" max lag: {self.max_lag * 1000:.1f} ms",
+            f"Worst stalls (>= {self.stall_threshold * 1000:.0f} ms):",
+        ]
+        for lag, wall_time, stack in self.stalls:
+            when = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(wall_time))
+            lines.append(f"- {lag * 1000:.1f} ms at {when}\n{stack}")
+        return "\n".join(lines)
+
+
+_lag_monitor = LoopLagMonitor()
+_profiling = False
+
+
+def start_lag_monitor() -> None:
+    _lag_monitor.start()
+
+
+def lag_report() -> str:
+    return _lag_monitor.report()
+
+
+async def profile_loop(seconds: float, output_dir: Path = PROFILE_DIR) -> Path:
+    """Profiles everything running on the event loop for `seconds` and writes
+    a text report next to the raw `.prof` stats."""
+    global _profiling
+    if _profiling:
+        raise RuntimeError("The event loop is already being profiled.")
+    _profiling = True
+    try:
+        logging.info("Profiling event loop for %s seconds.", seconds)
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+    finally:
+        _profiling = False
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"loop-profile-{time.strftime('%Y%m%d-%H%M%S')}.txt"
+    profiler.dump_stats(path.with_suffix(".prof"))
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(lag_report() + "\n\n")
+        stats = pstats.Stats(profiler, stream=file)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(50)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(50)
+    logging.info("Event loop profile written to %s", path)
+    return path
+
+
+def install_profile_signal_handler(seconds: float = 30.0) -> None:
+    # SIGUSR1 does not exist on Windows; use the HTTP admin endpoint there.
+    if not hasattr(signal, "SIGUSR1"):
+        return
+
+    def on_profile_done(task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            logging.error("Event loop profiling failed: %s", task.exception())
+
+    def on_signal() -> None:
+        asyncio.ensure_future(profile_loop(seconds)).add_done_callback(on_profile_done)
+
+    asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, on_signal)
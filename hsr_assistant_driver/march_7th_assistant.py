@@ -8,16 +8,24 @@ MARCH_7TH_ASSISTANT_DIR = Path(__file__).parent.parent / "March7thAssistant"
 AUTO_SIMULATED_UNIVERSE_DIR = Path(__file__).parent.parent / "Auto_Simulated_Universe"
 
 
-def prepare_config_yaml(updates: dict) -> None:
+def prepare_config_yaml(
+    updates: dict, march_7th_assistant_dir: Path = MARCH_7TH_ASSISTANT_DIR
+) -> None:
     # Write this minimal config.yaml. Other configs will be defaults.
-    config_file_path = MARCH_7TH_ASSISTANT_DIR / "config.yaml"
+    config_file_path = march_7th_assistant_dir / "config.yaml"
     with open(config_file_path, "w", encoding="utf-8") as file:
         yaml.safe_dump(
             updates, file, default_flow_style=False, allow_unicode=True, sort_keys=False
         )
 
 
-def prepare_to_run(run_config: dict) -> tuple[list[str], dict[str, Any]]:
+def prepare_to_run(
+    run_config: dict,
+    march_7th_assistant_dir: Path = MARCH_7TH_ASSISTANT_DIR,
+    auto_simulated_universe_dir: Path = AUTO_SIMULATED_UNIVERSE_DIR,
+    config_overrides: dict | None = None,
+) -> tuple[list[str], dict[str, Any]]:
+    config_overrides = config_overrides or {}
     task: str = run_config["task"]
     if task == "material":
         category: str = run_config["material_config"]["category"]
@@ -26,7 +34,9 @@ def prepare_to_run(run_config: dict) -> tuple[list[str], dict[str, Any]]:
             "instance_type": category,
             "instance_names": {category: id},
         }
-        prepare_config_yaml(config_updates)
+        prepare_config_yaml(
+            {**config_overrides, **config_updates}, march_7th_assistant_dir
+        )
 
         args = ["power"]
     elif task == "universe":
@@ -34,7 +44,7 @@ def prepare_to_run(run_config: dict) -> tuple[list[str], dict[str, Any]]:
         difficulty = run_config["universe_config"].get("difficulty", 0)
 
         python_exe_path = (
-            AUTO_SIMULATED_UNIVERSE_DIR / ".venv" / "Scripts" / "python.exe"
+            auto_simulated_universe_dir / ".venv" / "Scripts" / "python.exe"
         )
         universe_category = "divergent" if universe_type == "差分宇宙" else "universe"
 
@@ -44,21 +54,26 @@ def prepare_to_run(run_config: dict) -> tuple[list[str], dict[str, Any]]:
             "universe_category": universe_category,
             "universe_bonus_enable": True,
             "universe_count": 1,
-            "universe_path": str(AUTO_SIMULATED_UNIVERSE_DIR),
+            "universe_path": str(auto_simulated_universe_dir),
             "universe_requirements": True,
             "universe_difficulty": difficulty,
         }
-        prepare_config_yaml(config_updates)
+        prepare_config_yaml(
+            {**config_overrides, **config_updates}, march_7th_assistant_dir
+        )
 
         args = ["universe"]
     elif task == "claim_reward":
+        if config_overrides:
+            prepare_config_yaml(config_overrides, march_7th_assistant_dir)
+
         args = ["claim_reward_daily_training"]
     else:
         raise NotImplementedError
 
-    python = MARCH_7TH_ASSISTANT_DIR / ".venv" / "Scripts" / "python.exe"
+    python = march_7th_assistant_dir / ".venv" / "Scripts" / "python.exe"
 
-    args = [str(python), str(MARCH_7TH_ASSISTANT_DIR / "main.py"), *args]
-    kwargs = {"cwd": str(MARCH_7TH_ASSISTANT_DIR)}
+    args = [str(python), str(march_7th_assistant_dir / "main.py"), *args]
+    kwargs = {"cwd": str(march_7th_assistant_dir)}
 
     return args, kwargs
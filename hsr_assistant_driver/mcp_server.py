@@ -6,26 +6,82 @@ import traceback
 
 from mcp import types
 from mcp.server.lowlevel import Server
+from mcp.server.lowlevel.server import request_ctx
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
 
+from hsr_assistant_driver.callbacks import MCP_CALLBACK
 from hsr_assistant_driver.driver import (
-    HSR_ASSISTANT_ARGS_JSON_SCHEMA,
     call_hsr_assistant,
+    hsr_assistant_args_json_schema,
+    reattach_assistant,
 )
+from hsr_assistant_driver.loop_monitor import (
+    install_profile_signal_handler,
+    lag_report,
+    profile_loop,
+    start_lag_monitor,
+)
+
+
+# Stands in for the http server's /admin endpoints, and for SIGUSR1 where it
+# does not exist (Windows).
+ADMIN_TOOL_ARGS_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action": {"type": "string", "enum": ["loop_lag", "profile"]},
+        "seconds": {
+            "type": "number",
+            "description": "How long 'profile' profiles the event loop.",
+            "default": 30,
+        },
+    },
+    "required": ["action"],
+}
 
 
 def tool_definition() -> types.Tool:
     return types.Tool(
         name="hsr_assistant",
         description="",
-        inputSchema=HSR_ASSISTANT_ARGS_JSON_SCHEMA,
+        inputSchema=hsr_assistant_args_json_schema(),
     )
 
 
+def admin_tool_definition() -> types.Tool:
+    return types.Tool(
+        name="hsr_assistant_admin",
+        description="Event loop diagnostics of the driver. 'loop_lag' reports "
+        "scheduling delay and the worst stalls, 'profile' profiles the loop and "
+        "returns the path of the written report.",
+        inputSchema=ADMIN_TOOL_ARGS_JSON_SCHEMA,
+    )
+
+
+async def admin_tool_call(action: str, seconds: float = 30.0) -> types.CallToolResult:
+    try:
+        if action == "loop_lag":
+            result = lag_report()
+        elif action == "profile":
+            result = str(await profile_loop(seconds))
+        else:
+            raise ValueError(f"Unknown admin action: {action}")
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text=result)]
+        )
+    except Exception:
+        msg = f"Error calling hsr_assistant_admin, traceback:\n{traceback.format_exc()}"
+        logging.exception(msg)
+        return types.CallToolResult(
+            isError=True, content=[types.TextContent(type="text", text=msg)]
+        )
+
+
 async def tool_call(*args, **kwargs) -> types.CallToolResult:
     if "run_config" not in kwargs:
         kwargs["run_config"] = None
+    if kwargs.get("callback") == MCP_CALLBACK:
+        kwargs["mcp_session"] = request_ctx.get().session
     try:
         result = await call_hsr_assistant(*args, **kwargs)
         if isinstance(result, str):
@@ -46,8 +102,10 @@ async def call_tool_request_handler(
     request: types.CallToolRequest,
 ) -> types.ServerResult:
     name = request.params.name
-    assert name == "hsr_assistant", "Tool name is not hsr_assistant"
     arguments = request.params.arguments
+    if name == "hsr_assistant_admin":
+        return types.ServerResult(root=await admin_tool_call(**arguments))
+    assert name == "hsr_assistant", "Tool name is not hsr_assistant"
     result = await tool_call(**arguments)
     return types.ServerResult(root=result)
 
@@ -55,10 +113,15 @@ async def call_tool_request_handler(
 async def list_tools_request_handler(
     _request: types.ListToolsRequest,
 ) -> types.ServerResult:
-    return types.ServerResult(root=types.ListToolsResult(tools=[tool_definition()]))
+    return types.ServerResult(
+        root=types.ListToolsResult(tools=[tool_definition(), admin_tool_definition()])
+    )
 
 
 async def start_server(mcp_server: Server):
+    start_lag_monitor()
+    install_profile_signal_handler()
+    logging.info(await reattach_assistant())
     try:
         async with stdio_server() as (read_stream, write_stream):
             await mcp_server.run(
@@ -68,7 +131,8 @@ async def start_server(mcp_server: Server):
                     server_name="tool-hsr-assistant",
                     server_version="0.1.0",
                     capabilities=types.ServerCapabilities(
-                        tools=types.ToolsCapability()
+                        tools=types.ToolsCapability(),
+                        logging=types.LoggingCapability(),
                     ),
                 ),
             )
@@ -1,5 +1,6 @@
 import logging
 import os
+from contextlib import asynccontextmanager
 from typing import Literal
 
 from fastapi import FastAPI
@@ -7,12 +8,27 @@ from pydantic import BaseModel, model_validator
 from starlette.responses import JSONResponse
 
 from hsr_assistant_driver.driver import (
-    HSR_ASSISTANT_ARGS_JSON_SCHEMA,
     call_hsr_assistant,
+    hsr_assistant_args_json_schema,
+    reattach_assistant,
 )
+from hsr_assistant_driver.loop_monitor import (
+    install_profile_signal_handler,
+    lag_report,
+    profile_loop,
+    start_lag_monitor,
+)
+
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    start_lag_monitor()
+    install_profile_signal_handler()
+    logging.info(await reattach_assistant())
+    yield
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/definition")
@@ -20,7 +36,7 @@ async def definition_endpoint():
     definition = {
         "name": "hsr_assistant",
         "description": "",
-        "input_schema": HSR_ASSISTANT_ARGS_JSON_SCHEMA,
+        "input_schema": hsr_assistant_args_json_schema(),
     }
     return JSONResponse({"data": definition})
 
@@ -28,6 +44,8 @@ async def definition_endpoint():
 class ActionArgument(BaseModel):
     action: Literal["run", "wait", "stop"]
     run_config: dict | None = None
+    callback: str | None = None
+    instance: str | None = None
 
     @model_validator(mode="after")
     def check_run_config_if_action_run(self):
@@ -35,16 +53,40 @@ class ActionArgument(BaseModel):
             raise ValueError("run_config is required when action is 'run'")
         return self
 
+    @model_validator(mode="after")
+    def check_callback_is_url(self):
+        if self.callback is not None and not self.callback.startswith(
+            ("http://", "https://")
+        ):
+            raise ValueError("callback must be an http(s) URL")
+        return self
+
 
 @app.post("/action")
 async def run_endpoint(args: ActionArgument):
     try:
-        result = await call_hsr_assistant(args.action, args.run_config)
+        result = await call_hsr_assistant(
+            args.action, args.run_config, args.callback, args.instance
+        )
         return JSONResponse({"data": result})
     except Exception as e:
         return JSONResponse({"error": str(e)}, status_code=500)
 
 
+@app.get("/admin/loop_lag")
+async def loop_lag_endpoint():
+    return JSONResponse({"data": lag_report()})
+
+
+@app.post("/admin/profile")
+async def profile_endpoint(seconds: float = 30.0):
+    try:
+        path = await profile_loop(seconds)
+        return JSONResponse({"data": str(path)})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
 def main():
     logging.basicConfig(
         level=os.getenv("LOG_LEVEL"),
@@ -0,0 +1,136 @@
+import json
+import logging
+import math
+from pathlib import Path
+
+
+RUN_HISTORY_FILE = Path(__file__).parent.parent / "run_history.json"
+
+# Key for the longest gap of a whole run, used when a stage has no history.
+ANY_STAGE = "*"
+MAX_RUNS_KEPT = 50
+MIN_RUNS_TO_LEARN = 5
+PERCENTILE = 0.95
+# A hang is declared after this multiple of the usual longest silence.
+SAFETY_FACTOR = 2.0
+MIN_TIMEOUT = 60.0
+MAX_TIMEOUT = 3600.0
+# A stage that times out this many runs in a row falls back to the default,
+# in case it became slower than its learned timeout allows.
+TIMEOUTS_TO_DISTRUST = 2
+
+
+def task_key(run_config: dict) -> str:
+    task = run_config["task"]
+    if task == "material":
+        return f"{task}:{run_config['material_config']['category']}"
+    elif task == "universe":
+        return f"{task}:{run_config['universe_config']['type']}"
+    elif task == "claim_reward":
+        return f"{task}:{run_config['claim_reward_config']['type']}"
+    return task
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    rank = max(math.ceil(fraction * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class TimeoutPolicy:
+    """No-output timeout per stage of one run.
+
+    Precedence: stage override, run override, learned stage timeout, learned
+    run timeout, default.
+    """
+
+    def __init__(
+        self,
+        default: float,
+        learned: dict[str, float] | None = None,
+        overrides: dict | None = None,
+    ):
+        self.default = default
+        self.learned = learned or {}
+        self.overrides = overrides or {}
+
+    def no_output_timeout(self, stage: str) -> float:
+        stage_overrides = self.overrides.get("stages", {})
+        if stage in stage_overrides:
+            return stage_overrides[stage]
+        if "no_output" in self.overrides:
+            return self.overrides["no_output"]
+        if stage in self.learned:
+            return self.learned[stage]
+        return self.learned.get(ANY_STAGE, self.default)
+
+
+class RunHistory:
+    """Longest output gap of each stage in past healthy runs, per task, and
+    how many runs in a row each stage has timed out."""
+
+    def __init__(self, path: Path = RUN_HISTORY_FILE):
+        self.path = path
+        self.runs: dict[str, dict[str, list[float]]] = {}
+        self.timeouts: dict[str, dict[str, int]] = {}
+        if path.exists():
+            try:
+                with open(path, encoding="utf-8") as file:
+                    data = json.load(file)
+                if "runs" in data:
+                    self.runs = data["runs"]
+                    self.timeouts = data.get("timeouts", {})
+                else:  # Written before timeouts were counted.
+                    self.runs = data
+            except (OSError, ValueError) as e:
+                logging.warning("Ignoring unreadable run history %s: %s", path, e)
+
+    def policy(self, run_config: dict, default: float) -> TimeoutPolicy:
+        key = task_key(run_config)
+        # Learning only ever tightens the default; `run_config.timeouts` is
+        # the way to allow longer silences.
+        ceiling = min(MAX_TIMEOUT, default)
+        learned = {}
+        for stage, gaps in self.runs.get(key, {}).items():
+            if len(gaps) >= MIN_RUNS_TO_LEARN:
+                timeout = percentile(gaps, PERCENTILE) * SAFETY_FACTOR
+                learned[stage] = min(max(timeout, MIN_TIMEOUT), ceiling)
+        for stage, count in self.timeouts.get(key, {}).items():
+            if count >= TIMEOUTS_TO_DISTRUST:
+                learned[stage] = default
+        logging.info("Learned timeouts for %s: %s", key, learned)
+        return TimeoutPolicy(default, learned, run_config.get("timeouts"))
+
+    def record(
+        self,
+        run_config: dict,
+        stage_max_gaps: dict[str, float],
+        timed_out_stage: str | None = None,
+    ) -> None:
+        # A timed-out stage may have hung, so its gaps are never learned from,
+        # and neither is the longest gap of the incomplete run.
+        key = task_key(run_config)
+        task_timeouts = self.timeouts.setdefault(key, {})
+        stage_max_gaps = dict(stage_max_gaps)
+        if timed_out_stage is not None:
+            stage_max_gaps.pop(timed_out_stage, None)
+            task_timeouts[timed_out_stage] = task_timeouts.get(timed_out_stage, 0) + 1
+        elif stage_max_gaps:
+            stage_max_gaps[ANY_STAGE] = max(stage_max_gaps.values())
+
+        task_runs = self.runs.setdefault(key, {})
+        for stage, gap in stage_max_gaps.items():
+            gaps = task_runs.setdefault(stage, [])
+            gaps.append(round(gap, 3))
+            del gaps[:-MAX_RUNS_KEPT]
+            task_timeouts.pop(stage, None)
+        try:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(
+                    {"runs": self.runs, "timeouts": self.timeouts},
+                    file,
+                    ensure_ascii=False,
+                    indent=2,
+                )
+        except OSError as e:
+            logging.warning("Failed to save run history %s: %s", self.path, e)
@@ -0,0 +1,101 @@
+import json
+import logging
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+# Tracks ("threads") of the exported timeline.
+DRIVER_TRACK = 1
+OUTPUT_TRACK = 2
+
+
+class RunTracer:
+    """Collects the lifecycle spans of one run and exports them in the Trace
+    Event Format, which Perfetto and chrome://tracing can load."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.events: list[dict] = []
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def _us(self, timestamp: float) -> float:
+        return round((timestamp - self.start) * 1e6, 1)
+
+    def add_span(
+        self, name: str, start: float, end: float, track: int = DRIVER_TRACK, **args
+    ) -> None:
+        self.events.append(
+            {
+                "name": name,
+                "ph": "X",
+                "ts": self._us(start),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": 1,
+                "tid": track,
+                "args": args,
+            }
+        )
+
+    @contextmanager
+    def span(self, name: str, track: int = DRIVER_TRACK, **args) -> Iterator[None]:
+        start = self.now()
+        try:
+            yield
+        except BaseException as e:
+            args["error"] = type(e).__name__
+            raise
+        finally:
+            self.add_span(name, start, self.now(), track, **args)
+
+    def event(self, name: str, track: int = DRIVER_TRACK, **args) -> None:
+        self.events.append(
+            {
+                "name": name,
+                "ph": "i",
+                "s": "t",
+                "ts": self._us(self.now()),
+                "pid": 1,
+                "tid": track,
+                "args": args,
+            }
+        )
+
+    def export(self, path: Path) -> None:
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": self.name}},
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": DRIVER_TRACK,
+                "args": {"name": "driver"},
+            },
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": 1,
+                "tid": OUTPUT_TRACK,
+                "args": {"name": "assistant output"},
+            },
+        ]
+        try:
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(
+                    {"traceEvents": metadata + self.events, "displayTimeUnit": "ms"},
+                    file,
+                    ensure_ascii=False,
+                )
+            logging.info("Run trace written to %s", path)
+        except OSError as e:
+            logging.warning("Failed to write run trace %s: %s", path, e)
+
+
+def trace_path(trace_dir: Path, run_config: dict) -> Path:
+    trace_dir.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{run_config.get('task')}.trace.json"
+    return trace_dir / name